@@ -0,0 +1,198 @@
+"""Streaming export of pricing worksheets to CSV or Parquet.
+
+Worksheets are paged through in fixed-size row ranges and each page is written
+out before the next is fetched, so memory stays at one chunk no matter how
+long the sheet is. CSV pages are appended to the file; Parquet pages become
+one row group each. In the app, the finished file is uploaded to the
+pipeline's Drive folder in resumable chunks and then deleted, so it is never
+held in memory or left on local disk.
+
+    python export_sheets.py selections.csv --worksheet "User Prediction Selections"
+    python export_sheets.py summary.parquet --spreadsheet-id <id> --keyfile key.json
+"""
+
+import argparse
+import csv
+import glob
+import os
+import sys
+import tempfile
+import time
+
+from googleapiclient.discovery import build
+from googleapiclient.http import MediaFileUpload
+from gspread.utils import rowcol_to_a1
+
+from pricing_engine import COMMERCIAL_FOLDER_ID, authorize, list_snapshots
+
+
+CHUNK_SIZE = 5000
+FORMATS = ("csv", "parquet")
+MIME_TYPES = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+TEMP_PREFIX = "pricing-export-"
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+def iter_row_chunks(worksheet, chunk_size=CHUNK_SIZE):
+    """Yield the worksheet's rows in lists of at most ``chunk_size``.
+
+    Rows are padded to the sheet's column count. The Sheets API drops the
+    blank rows at the end of every range, so each page up to the grid end is
+    read and blank rows are put back wherever data follows them; only the
+    blank rows after the last data row are left out.
+    """
+    n_rows, n_cols = worksheet.row_count, worksheet.col_count
+    blank_rows = 0  # blank rows since the last data row, not yet yielded
+    for start in range(1, n_rows + 1, chunk_size):
+        end = min(start + chunk_size - 1, n_rows)
+        rows = worksheet.get(f"{rowcol_to_a1(start, 1)}:{rowcol_to_a1(end, n_cols)}")
+        if not rows:
+            blank_rows += end - start + 1
+            continue
+        for done in range(0, blank_rows, chunk_size):
+            yield [[""] * n_cols for _ in range(min(chunk_size, blank_rows - done))]
+        yield [row + [""] * (n_cols - len(row)) for row in rows]
+        blank_rows = end - start + 1 - len(rows)
+
+
+def _trim_columns(chunks):
+    """Drop the blank columns right of the header and yield (header, rows) pages."""
+    chunks = iter(chunks)
+    first = next(chunks, None)
+    if not first:
+        return
+    header = first[0]
+    width = len(header)
+    while width and header[width - 1] == "":
+        width -= 1
+    header = [name or f"column_{i + 1}" for i, name in enumerate(header[:width])]
+    yield header, [row[:width] for row in first[1:]]
+    for rows in chunks:
+        yield header, [row[:width] for row in rows]
+
+
+def write_csv(chunks, out):
+    """Write pages to a text file object; yields running row counts."""
+    writer = csv.writer(out)
+    done = 0
+    for i, (header, rows) in enumerate(_trim_columns(chunks)):
+        if i == 0:
+            writer.writerow(header)
+        writer.writerows(rows)
+        done += len(rows)
+        yield done
+
+
+def write_parquet(chunks, out):
+    """Write pages as string-typed Parquet row groups; yields running row counts."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export needs pyarrow: pip install pyarrow") from None
+
+    writer = None
+    done = 0
+    try:
+        for header, rows in _trim_columns(chunks):
+            if writer is None:
+                schema = pa.schema([(name, pa.string()) for name in header])
+                writer = pq.ParquetWriter(out, schema)
+            columns = [list(column) for column in zip(*rows)] if rows else [[] for _ in header]
+            writer.write_table(pa.Table.from_arrays([pa.array(c, pa.string()) for c in columns], schema=schema))
+            done += len(rows)
+            yield done
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def export_worksheet(worksheet, out, fmt="csv", chunk_size=CHUNK_SIZE, progress=None):
+    """Stream ``worksheet`` into ``out`` (text file for CSV, path or binary file for Parquet).
+
+    ``progress(rows_done, row_count)`` is called after every page; row_count
+    is the sheet's grid size, an upper bound on the data rows. Returns the
+    number of data rows written.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    write = write_csv if fmt == "csv" else write_parquet
+    done = 0
+    for done in write(iter_row_chunks(worksheet, chunk_size), out):
+        if progress:
+            progress(done, worksheet.row_count)
+    return done
+
+
+def temp_export_path(fmt, max_age=3600):
+    """New temp file for an export, after deleting exports older than ``max_age`` seconds.
+
+    Exports are removed once uploaded; the sweep catches any left behind by a
+    session or process that died mid-export.
+    """
+    cutoff = time.time() - max_age
+    for path in glob.glob(os.path.join(tempfile.gettempdir(), f"{TEMP_PREFIX}*")):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+    fd, path = tempfile.mkstemp(prefix=TEMP_PREFIX, suffix=f".{fmt}")
+    os.close(fd)
+    return path
+
+
+def upload_to_drive(drive_service, path, folder_id, name, fmt, progress=None):
+    """Upload a finished export to a Drive folder in resumable chunks; returns its web link.
+
+    The file is sent from disk ``UPLOAD_CHUNK_SIZE`` bytes at a time, so the
+    export never has to fit in memory. ``progress(fraction)`` is called per chunk.
+    """
+    media = MediaFileUpload(path, mimetype=MIME_TYPES[fmt], chunksize=UPLOAD_CHUNK_SIZE, resumable=True)
+    request = drive_service.files().create(
+        body={"name": name, "parents": [folder_id]}, media_body=media, fields="id, webViewLink"
+    )
+    response = None
+    while response is None:
+        status, response = request.next_chunk()
+        if status and progress:
+            progress(status.progress())
+    return response["webViewLink"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream a pricing worksheet to CSV or Parquet.")
+    parser.add_argument("output", help="destination file; format is taken from the extension unless --format is given")
+    parser.add_argument("--worksheet", default="User Prediction Selections")
+    parser.add_argument("--spreadsheet-id", help="defaults to the most recent sheet in the pipeline folder")
+    parser.add_argument("--keyfile", help="service account JSON; defaults to Streamlit secrets")
+    parser.add_argument("--format", choices=FORMATS)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    client, creds = authorize(args.keyfile)
+
+    spreadsheet_id = args.spreadsheet_id
+    if not spreadsheet_id:
+        files = list_snapshots(build("drive", "v3", credentials=creds), COMMERCIAL_FOLDER_ID)
+        if not files:
+            sys.exit("No Google Sheets found in the folder.")
+        spreadsheet_id = files[0]["id"]
+        print(f"Using most recent sheet: {files[0]['name']}", file=sys.stderr)
+
+    worksheet = client.open_by_key(spreadsheet_id).worksheet(args.worksheet)
+    fmt = args.format or ("parquet" if args.output.endswith(".parquet") else "csv")
+
+    def progress(done, total):
+        print(f"\r{done:,} rows exported (sheet grid {total:,} rows)", end="", file=sys.stderr)
+
+    if fmt == "csv":
+        with open(args.output, "w", newline="", encoding="utf-8") as out:
+            rows = export_worksheet(worksheet, out, fmt, args.chunk_size, progress)
+    else:
+        rows = export_worksheet(worksheet, args.output, fmt, args.chunk_size, progress)
+    print(f"\nWrote {rows:,} rows to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+"""Multi-session load test for the commercial pricing app.
+
+Runs the real script under one Streamlit server process, as it is deployed,
+with the Google Sheets / Drive APIs replaced by an in-memory fake, and opens
+N concurrent websocket sessions against it that each click through select
+type -> predict -> pick range -> submit. All sessions share the server's
+caches, script threads and GIL, so each level reports what one server
+sustains with N users at once: throughput, p50/p99 rerun latency (from
+sending a rerun to its script_finished message) and API calls per session,
+plus retained memory per connected session with --memory.
+
+Every level starts a fresh server and warms its caches with one untimed
+session. Memory is measured with tracemalloc on a second, untimed server so
+tracing never inflates the latency numbers.
+
+    python load_test.py --levels 1,2,4,8,16 --rounds 3 --api-latency 50 --memory
+"""
+
+import argparse
+import asyncio
+import csv
+import gc
+import multiprocessing
+import os
+import random
+import socket
+import sys
+import threading
+import time
+import tracemalloc
+import urllib.request
+from collections import Counter
+from pathlib import Path
+from unittest import mock
+
+import gspread
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from streamlit.web import bootstrap
+from websockets.asyncio.client import connect
+
+
+PRODUCTS = [
+    "Update Search", "Current Owner Search", "Two Owner Search",
+    "Full 30 YR Search", "Full 40 YR Search", "Full 50 YR Search",
+    "Full 60 YR Search", "Full 80 YR Search", "Full 100 YR Search",
+]
+SUMMARY_HEADERS = [
+    "Mapped Type", "Mapped Product Ordered", "Offline/Online",
+    "Adjusted Forecasted Pricing (mean)", "Adjusted Forecasted Pricing (median)",
+    "Smoothed Forecasted Pricing (mean)", "Smoothed Forecasted Pricing (median)",
+    "Predicted Forecasted Pricing (mean)", "Predicted Forecasted Pricing (median)",
+]
+
+
+class FakeBackend:
+    """Stands in for the gspread client and the Drive service; counts every API call."""
+
+    def __init__(self, summary_rows, latency=0.0):
+        self.lock = threading.Lock()
+        self.calls = Counter()
+        self.latency = latency
+        self.spreadsheet = FakeSpreadsheet(self, {"Summary Sheet": FakeWorksheet(self, summary_rows)})
+        self.drive = FakeDrive(self)
+
+    def call(self, name):
+        with self.lock:
+            self.calls[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def total_calls(self):
+        with self.lock:
+            return sum(self.calls.values())
+
+    def open_by_key(self, key):
+        self.call("open_by_key")
+        return self.spreadsheet
+
+
+class FakeSpreadsheet:
+    def __init__(self, backend, worksheets):
+        self.backend = backend
+        self.worksheets = worksheets
+
+    def worksheet(self, title):
+        self.backend.call("worksheet")
+        with self.backend.lock:
+            if title not in self.worksheets:
+                raise gspread.exceptions.WorksheetNotFound(title)
+            return self.worksheets[title]
+
+    def add_worksheet(self, title, rows, cols):
+        self.backend.call("add_worksheet")
+        with self.backend.lock:
+            return self.worksheets.setdefault(title, FakeWorksheet(self.backend, []))
+
+
+class FakeWorksheet:
+    def __init__(self, backend, rows):
+        self.backend = backend
+        self.rows = rows
+
+    def get_all_records(self):
+        self.backend.call("get_all_records")
+        with self.backend.lock:
+            header, body = (self.rows[0], self.rows[1:]) if self.rows else ([], [])
+            return [dict(zip(header, row)) for row in body]
+
+    def get_all_values(self):
+        self.backend.call("get_all_values")
+        with self.backend.lock:
+            return [[str(v) for v in row] for row in self.rows]
+
+    def row_values(self, row):
+        self.backend.call("row_values")
+        with self.backend.lock:
+            return [str(v) for v in self.rows[row - 1]] if len(self.rows) >= row else []
+
+    def append_row(self, values):
+        self.backend.call("append_row")
+        with self.backend.lock:
+            self.rows.append(list(values))
+
+    def clear(self):
+        self.backend.call("clear")
+        with self.backend.lock:
+            self.rows.clear()
+
+
+class FakeDrive:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def files(self):
+        return self
+
+    def list(self, **kwargs):
+        return self
+
+    def execute(self):
+        self.backend.call("drive.files.list")
+        return {"files": [{"id": "fake-latest", "name": "Load Test Summary", "createdTime": "2025-05-13T00:00:00Z"}]}
+
+
+def make_summary_rows(n_types, seed=0):
+    rng = random.Random(seed)
+    rows = [SUMMARY_HEADERS]
+    for t in range(n_types):
+        for product in PRODUCTS:
+            for online in ("Online", "Ground"):
+                base = rng.randint(150, 2500)
+                rows.append([f"Type {t:03d}", product, online] + [
+                    round(base * rng.uniform(0.85, 1.15), 2) for _ in SUMMARY_HEADERS[3:]
+                ])
+    return rows
+
+
+def _widgets(elements, kind, label=None):
+    """Protos of the ``kind`` widgets (e.g. "selectbox") in a rerun's elements, optionally by label."""
+    return [
+        getattr(e, kind) for e in elements
+        if e.WhichOneof("type") == kind and (label is None or getattr(e, kind).label == label)
+    ]
+
+
+def _serve(app_path, port, summary_rows, latency, trace_memory, control):
+    """Server process: the app under a real Streamlit server, backed by the fake APIs.
+
+    A thread answers ``"calls"`` / ``"memory"`` requests on the ``control`` pipe
+    with the backend's API call total and tracemalloc's current traced bytes.
+    """
+    # Keep the server's start-up banner out of the results table
+    sys.stdout = open(os.devnull, "w")
+    if trace_memory:
+        tracemalloc.start()
+    backend = FakeBackend(summary_rows, latency=latency)
+    patches = [
+        mock.patch("gspread.authorize", lambda creds, **kwargs: backend),
+        mock.patch("oauth2client.service_account.ServiceAccountCredentials.from_json_keyfile_dict",
+                   lambda info, scope: object()),
+        mock.patch("googleapiclient.discovery.build", lambda *args, **kwargs: backend.drive),
+        mock.patch("streamlit.secrets", {"google_sheets": {"json_key": "{}"}}),
+    ]
+    for p in patches:
+        p.start()
+
+    def answer():
+        while True:
+            request = control.recv()
+            if request == "calls":
+                control.send(backend.total_calls())
+            elif request == "memory":
+                gc.collect()
+                control.send(tracemalloc.get_traced_memory()[0])
+
+    threading.Thread(target=answer, daemon=True).start()
+
+    flag_options = {
+        "server_address": "127.0.0.1", "server_port": port, "server_headless": True,
+        "server_fileWatcherType": "none", "browser_gatherUsageStats": False,
+    }
+    bootstrap.load_config_options(flag_options)
+    bootstrap.run(app_path, False, [], flag_options)
+
+
+class AppServer:
+    """A Streamlit server process running the app against a fresh fake backend."""
+
+    def __init__(self, app_path, summary_rows, latency, trace_memory=False, startup_timeout=60.0):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            self.port = s.getsockname()[1]
+        self.url = f"ws://127.0.0.1:{self.port}/_stcore/stream"
+        self.control, child_control = multiprocessing.Pipe()
+        self.process = multiprocessing.get_context("spawn").Process(
+            target=_serve, args=(app_path, self.port, summary_rows, latency, trace_memory, child_control),
+            daemon=True,
+        )
+        self.process.start()
+
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{self.port}/_stcore/health", timeout=1):
+                    return
+            except OSError:
+                if not self.process.is_alive() or time.monotonic() > deadline:
+                    self.close()
+                    raise RuntimeError("Streamlit server did not start")
+                time.sleep(0.2)
+
+    def stat(self, name):
+        self.control.send(name)
+        return self.control.recv()
+
+    def close(self):
+        self.process.terminate()
+        self.process.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+async def _rerun(ws, widget, latencies, timeout):
+    """Send one rerun, optionally with a changed widget value; returns the elements it drew.
+
+    Only the changed widget is sent; the session keeps every other widget's
+    value from the previous run.
+    """
+    msg = BackMsg()
+    msg.rerun_script.SetInParent()
+    if widget is not None:
+        msg.rerun_script.widget_states.widgets.append(widget)
+    start = time.perf_counter()
+    await ws.send(msg.SerializeToString())
+    elements = []
+    while True:
+        reply = ForwardMsg()
+        reply.ParseFromString(await asyncio.wait_for(ws.recv(), timeout))
+        if reply.HasField("delta") and reply.delta.HasField("new_element"):
+            elements.append(reply.delta.new_element)
+        if reply.HasField("script_finished"):
+            break
+    latencies.append(time.perf_counter() - start)
+
+    exceptions = [e.exception for e in elements if e.WhichOneof("type") == "exception"]
+    if exceptions:
+        raise RuntimeError(exceptions[0].message)
+    return elements
+
+
+async def _session(ws, rng, mapped_types, latencies, timeout):
+    """One simulated user on an open websocket, clicking through the app like a browser would."""
+    def choose(element, option):
+        return WidgetState(id=element.id, string_value=option)
+
+    def click(elements, label):
+        return WidgetState(id=_widgets(elements, "button", label)[0].id, trigger_value=True)
+
+    elements = await _rerun(ws, None, latencies, timeout)
+    type_box = _widgets(elements, "selectbox", "Select Mapped Type")[0]
+    elements = await _rerun(ws, choose(type_box, rng.choice(mapped_types)), latencies, timeout)
+    elements = await _rerun(ws, click(elements, "Predict Pricing"), latencies, timeout)
+    radios = _widgets(elements, "radio")
+    if radios:
+        elements = await _rerun(ws, choose(radios[0], radios[0].options[0]), latencies, timeout)
+        await _rerun(ws, click(elements, "Submit to Sheet"), latencies, timeout)
+
+
+async def _run_users(url, seeds_per_user, mapped_types, timeout):
+    """Run every user's sessions one after another, all users at once; returns (latencies, errors)."""
+    latencies, errors = [], []
+
+    async def user(seeds):
+        for seed in seeds:
+            try:
+                async with connect(url, max_size=None) as ws:
+                    await _session(ws, random.Random(seed), mapped_types, latencies, timeout)
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+
+    await asyncio.gather(*(user(seeds) for seeds in seeds_per_user))
+    return latencies, errors
+
+
+async def _connected_memory(server, users, seed, mapped_types, timeout):
+    """Traced bytes the server retains for ``users`` sessions that are still connected."""
+    before = await asyncio.to_thread(server.stat, "memory")
+    sockets = [await connect(server.url, max_size=None) for _ in range(users)]
+    try:
+        await asyncio.gather(*(
+            _session(ws, random.Random(seed + i), mapped_types, [], timeout) for i, ws in enumerate(sockets)
+        ))
+        return await asyncio.to_thread(server.stat, "memory") - before
+    finally:
+        for ws in sockets:
+            await ws.close()
+
+
+def percentile(values, q):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+def run_level(args, summary_rows, users):
+    """``users`` concurrent users on one server, ``args.rounds`` sessions each."""
+    app_path = str(Path(args.app).resolve())
+    mapped_types = sorted({row[0] for row in summary_rows[1:]})
+    latency = args.api_latency / 1000
+    sessions = users * args.rounds
+    seeds = [range(args.seed + u * args.rounds, args.seed + (u + 1) * args.rounds) for u in range(users)]
+
+    with AppServer(app_path, summary_rows, latency) as server:
+        # Untimed warm-up so server start-up and the first sheet load are not counted as rerun latency
+        asyncio.run(_run_users(server.url, [[-1]], mapped_types, args.timeout))
+        calls_before = server.stat("calls")
+
+        start = time.perf_counter()
+        latencies, errors = asyncio.run(_run_users(server.url, seeds, mapped_types, args.timeout))
+        elapsed = time.perf_counter() - start
+        api_calls = server.stat("calls") - calls_before
+
+    memory_per_session = float("nan")
+    if args.memory:
+        with AppServer(app_path, summary_rows, latency, trace_memory=True) as server:
+            asyncio.run(_run_users(server.url, [[-1]], mapped_types, args.timeout))
+            retained = asyncio.run(_connected_memory(server, users, args.seed, mapped_types, args.timeout))
+            memory_per_session = retained / users
+
+    return {
+        "users": users,
+        "sessions": sessions,
+        "errors": len(errors),
+        "sessions_per_s": sessions / elapsed,
+        "reruns_per_s": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "api_calls_per_session": api_calls / sessions,
+        "memory_kib_per_session": memory_per_session / 1024,
+        "first_error": errors[0] if errors else "",
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default=str(Path(__file__).with_name("streamlit_commercial_05_13.py")))
+    parser.add_argument("--levels", default="1,2,4,8,16", help="comma-separated numbers of concurrent users on the one server")
+    parser.add_argument("--rounds", type=int, default=3, help="sessions per user at each level")
+    parser.add_argument("--types", type=int, default=50, help="mapped types in the fake Summary Sheet")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="simulated latency per API call (ms)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-rerun timeout (s)")
+    parser.add_argument("--memory", action="store_true", help="add an untimed tracemalloc server per level")
+    parser.add_argument("--csv", help="also write the results table to this file")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    summary_rows = make_summary_rows(args.types, args.seed)
+
+    results = []
+    print(f"{'users':>5} {'sess':>5} {'err':>4} {'sess/s':>8} {'rerun/s':>8} "
+          f"{'p50 ms':>8} {'p99 ms':>8} {'api/sess':>9} {'KiB/sess':>9}")
+    for users in [int(x) for x in args.levels.split(",")]:
+        r = run_level(args, summary_rows, users)
+        results.append(r)
+        print(f"{r['users']:>5} {r['sessions']:>5} {r['errors']:>4} {r['sessions_per_s']:>8.2f} "
+              f"{r['reruns_per_s']:>8.2f} {r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f} "
+              f"{r['api_calls_per_session']:>9.1f} {r['memory_kib_per_session']:>9.1f}")
+        if r["first_error"]:
+            print(f"      first error: {r['first_error']}", file=sys.stderr)
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(results[0]))
+            writer.writeheader()
+            writer.writerows(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+"""Discount curves for orders covering several parcels.
+
+PricingEngine.quote prices every parcel of an order in one pass and scales the
+additional parcels by one of these curves (passed as ``discount``) before
+summing.
+"""
+
+import numpy as np
+
+
+# Largest order the app will build a parcel table for
+MAX_PARCELS = 1000
+
+# Price multiplier for the n-th parcel of an order (n = 0 is the first, full-price parcel)
+DISCOUNT_CURVES = {
+    "No discount": lambda n: np.ones(len(n)),
+    "2% per additional parcel (min 50%)": lambda n: np.maximum(1 - 0.02 * n, 0.5),
+    "5% compounding per additional parcel (min 40%)": lambda n: np.maximum(0.95 ** n, 0.4),
+    "Tiered (2-10: 85%, 11-50: 70%, 51+: 60%)": lambda n: np.select([n == 0, n < 10, n < 50], [1.0, 0.85, 0.7], 0.6),
+}
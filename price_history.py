@@ -0,0 +1,184 @@
+"""Historical Summary Sheet snapshots from the pipeline's Drive folder.
+
+Every pipeline run drops a new spreadsheet into the folder. This module loads
+the newest N of them concurrently and aligns their price columns by
+(Mapped Type, Mapped Product Ordered, Offline/Online) into float32 matrices of
+shape (keys, snapshots), oldest snapshot first, so drift statistics are plain
+column-wise numpy operations.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import gspread
+import numpy as np
+import pandas as pd
+import requests
+
+from pricing_engine import KEY_COLUMNS, PRICE_COLUMNS, parse_prices
+
+
+_FAILED = object()
+
+
+def read_snapshot(client, file_id, price_columns=PRICE_COLUMNS):
+    """Fetch one Summary Sheet and reduce it to its keys and a float32 price block.
+
+    The sheet is read with a single values request; no spreadsheet metadata is
+    fetched. Returns None when the file has no usable Summary Sheet and lets
+    any other API error propagate. Only the reduced arrays outlive this call,
+    so at most ``max_workers`` raw sheets are held in memory at once, and a
+    snapshot never changes once written, so the result can be cached by file id.
+    """
+    try:
+        values = client.http_client.values_get(file_id, "'Summary Sheet'").get("values", [])
+    except gspread.exceptions.APIError as e:
+        # The values API answers 400 for a range naming a missing worksheet
+        if e.response.status_code == 400:
+            return None
+        raise
+    if len(values) < 2 or not set(KEY_COLUMNS).issubset(values[0]):
+        return None
+
+    header = values[0]
+    # The values API drops trailing blank cells, so pad every row to the header
+    rows = [row + [""] * (len(header) - len(row)) for row in values[1:]]
+    key_index = [header.index(c) for c in KEY_COLUMNS]
+    keys = pd.Index([tuple(row[i] for i in key_index) for row in rows])
+
+    prices = np.full((len(rows), len(price_columns)), np.nan, dtype=np.float32)
+    for j, column in enumerate(price_columns):
+        if column in header:
+            i = header.index(column)
+            prices[:, j] = parse_prices([row[i] for row in rows]).to_numpy(dtype=np.float32)
+
+    # The app prices from the first matching row, so keep the first duplicate too
+    first = ~keys.duplicated()
+    return list(keys[first]), prices[first]
+
+
+def _try_read(read, file_id):
+    """``read(file_id)``, returning _FAILED instead of raising once gspread's retries are spent."""
+    try:
+        return read(file_id)
+    except (gspread.exceptions.APIError, requests.exceptions.RequestException):
+        return _FAILED
+
+
+class SnapshotHistory:
+    """Price columns of several snapshots aligned on one shared key index.
+
+    ``failed`` lists the files that could not be read after retries and were
+    left out of ``snapshots``.
+    """
+
+    def __init__(self, keys, snapshots, prices, failed=()):
+        self.keys = keys
+        self.snapshots = snapshots
+        self.prices = prices
+        self.failed = list(failed)
+
+    def frame(self, column):
+        """(keys, snapshots) DataFrame view of one price column."""
+        return pd.DataFrame(self.prices[column], index=self.keys, columns=self.snapshots["createdTime"])
+
+    def key_frame(self, key):
+        """(snapshots, price columns) DataFrame for a single combination, or None."""
+        if key not in self.keys:
+            return None
+        row = self.keys.get_loc(key)
+        return pd.DataFrame(
+            {column: matrix[row] for column, matrix in self.prices.items()},
+            index=self.snapshots["createdTime"],
+        )
+
+
+def load_history(files, read, price_columns=PRICE_COLUMNS, max_workers=8):
+    """Load the Summary Sheets of ``files`` concurrently into a SnapshotHistory.
+
+    ``read(file_id)`` returns one snapshot's ``read_snapshot`` result for
+    ``price_columns``; pass a wrapper cached by file id so that widening the
+    window by one snapshot costs one Sheets read. Its client should be
+    authorized with ``http_client=gspread.BackOffHTTPClient`` so quota (429)
+    and server errors are retried with backoff; a snapshot that still fails
+    is skipped and listed in ``SnapshotHistory.failed`` rather than aborting
+    the load.
+
+    Keys are assigned rows as they are first seen and the price block grows by
+    doubling, so memory is bounded by (distinct keys x snapshots x columns)
+    float32 values rather than by the raw sheet contents.
+    """
+    files = sorted(files, key=lambda x: x["createdTime"])
+    positions = {}
+    capacity = 256
+    block = np.full((len(price_columns), capacity, len(files)), np.nan, dtype=np.float32)
+    loaded = np.zeros(len(files), dtype=bool)
+    failed = []
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = pool.map(lambda f: _try_read(read, f["id"]), files)
+        for s, result in enumerate(results):
+            if result is _FAILED:
+                failed.append(files[s])
+                continue
+            if result is None:
+                continue
+            keys, prices = result
+            rows = np.fromiter(
+                (positions.setdefault(k, len(positions)) for k in keys), dtype=np.intp, count=len(keys)
+            )
+            if len(positions) > capacity:
+                capacity = max(capacity * 2, len(positions))
+                grown = np.full((len(price_columns), capacity, len(files)), np.nan, dtype=np.float32)
+                grown[:, :block.shape[1]] = block
+                block = grown
+            block[:, rows, s] = prices.T
+            loaded[s] = True
+
+    block = block[:, :len(positions), loaded]
+    snapshots = pd.DataFrame([f for f, ok in zip(files, loaded) if ok], columns=["id", "name", "createdTime"])
+    snapshots["createdTime"] = pd.to_datetime(snapshots["createdTime"])
+    keys = pd.MultiIndex.from_tuples(list(positions), names=KEY_COLUMNS)
+    prices = {column: np.ascontiguousarray(block[j]) for j, column in enumerate(price_columns)}
+    return SnapshotHistory(keys, snapshots, prices, failed)
+
+
+def drift_stats(prices, jump_threshold=0.25):
+    """Per-key drift, volatility and outlier jumps for a (keys, snapshots) price frame.
+
+    Gaps (snapshots where a key is missing) are skipped: each step compares a
+    price with the previous observed price for the same key. A jump is a step
+    whose relative change exceeds ``jump_threshold``.
+    """
+    values = prices.to_numpy(dtype=np.float64)
+    n_keys, n_snapshots = values.shape
+    observed = ~np.isnan(values)
+    rows = np.arange(n_keys)
+
+    first = values[rows, observed.argmax(axis=1)]
+    last = values[rows, n_snapshots - 1 - observed[:, ::-1].argmax(axis=1)]
+
+    # Forward-fill along the snapshot axis so every step sees the last observed price
+    fill_index = np.maximum.accumulate(np.where(observed, np.arange(n_snapshots), 0), axis=1)
+    filled = values[rows[:, None], fill_index]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        steps = filled[:, 1:] / filled[:, :-1] - 1
+        drift_pct = last / first - 1
+    steps[~(observed[:, 1:] & np.isfinite(steps))] = np.nan
+    drift_pct[~np.isfinite(drift_pct)] = np.nan
+
+    has_steps = (~np.isnan(steps)).any(axis=1)
+    abs_steps = np.where(has_steps[:, None], np.abs(steps), 0)
+    with np.errstate(invalid="ignore"):
+        volatility = np.where(has_steps, np.nanstd(np.where(has_steps[:, None], steps, 0), axis=1), np.nan)
+    largest = np.where(has_steps, np.nanmax(abs_steps, axis=1), np.nan)
+
+    return pd.DataFrame({
+        "Snapshots": observed.sum(axis=1),
+        "First Price": first,
+        "Last Price": last,
+        "Drift": last - first,
+        "Drift %": drift_pct * 100,
+        "Volatility %": volatility * 100,
+        "Jumps": (abs_steps > jump_threshold).sum(axis=1),
+        "Largest Jump %": largest * 100,
+    }, index=prices.index)
@@ -0,0 +1,523 @@
+"""Schema-driven load / index / lookup pipeline shared by every pricing app.
+
+Each app describes its Summary Sheet with a PricingSchema (key columns, price
+columns, how price columns pair into ranges, rounding step, where the sheet
+lives). ``load_engine`` compiles a schema into a PricingEngine once per cache
+period: the sheet is fetched once, the price columns are coerced to floats
+and indexed by key, and lookups for one key or a whole batch of parcels are a
+single reindex against that index.
+"""
+
+import json
+from collections import Counter
+from dataclasses import dataclass
+from typing import Optional
+
+import gspread
+import numpy as np
+import pandas as pd
+import streamlit as st
+from googleapiclient.discovery import build
+from oauth2client.service_account import ServiceAccountCredentials
+
+
+SCOPE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+SPREADSHEET_MIME = "application/vnd.google-apps.spreadsheet"
+
+# Drive folder the commercial pipeline writes its dated Summary Sheets to
+COMMERCIAL_FOLDER_ID = "1udwJz9SBeISYJTOM7yRZE2p0dRGk3DW3"
+
+# Summary Sheet layout of the commercial pipeline
+KEY_COLUMNS = ["Mapped Type", "Mapped Product Ordered", "Offline/Online"]
+PRICE_COLUMNS = [
+    "Adjusted Forecasted Pricing (mean)", "Adjusted Forecasted Pricing (median)",
+    "Smoothed Forecasted Pricing (mean)", "Smoothed Forecasted Pricing (median)",
+    "Predicted Forecasted Pricing (mean)", "Predicted Forecasted Pricing (median)",
+]
+
+PRODUCT_HIERARCHY = {
+    "Update Search": 1, "Current Owner Search": 2, "Two Owner Search": 3,
+    "Full 30 YR Search": 4, "Full 40 YR Search": 5, "Full 50 YR Search": 6,
+    "Full 60 YR Search": 7, "Full 80 YR Search": 8, "Full 100 YR Search": 9,
+}
+
+
+class NoSpreadsheetFound(LookupError):
+    pass
+
+
+@dataclass(frozen=True)
+class RangeRule:
+    """Two price columns shown as a low-high range (the same column twice is a single price)."""
+    label: str
+    description: str
+    columns: tuple
+    collapse: bool = False  # show a single price when both bounds are equal
+
+
+@dataclass(frozen=True)
+class PricingSchema:
+    key_columns: tuple
+    price_columns: tuple
+    range_rules: tuple
+    rounding_step: Optional[int] = None  # round bounds up to this step; None keeps cents
+    spreadsheet_id: Optional[str] = None
+    folder_id: Optional[str] = None  # use the newest spreadsheet in this Drive folder
+    worksheet: str = "Summary Sheet"
+    info_columns: tuple = ()
+    keyfile: Optional[str] = None  # service account JSON file; Streamlit secrets otherwise
+
+
+COMMERCIAL_RANGE_RULES = (
+    RangeRule("A.", "Adjusted Mean – Smoothed Mean",
+              ("Adjusted Forecasted Pricing (mean)", "Smoothed Forecasted Pricing (mean)")),
+    RangeRule("B.", "Adjusted Median – Smoothed Median",
+              ("Adjusted Forecasted Pricing (median)", "Smoothed Forecasted Pricing (median)")),
+    RangeRule("C.", "Adjusted Mean – Adjusted Median",
+              ("Adjusted Forecasted Pricing (mean)", "Adjusted Forecasted Pricing (median)")),
+    RangeRule("D.", "Smoothed Mean – Smoothed Median",
+              ("Smoothed Forecasted Pricing (mean)", "Smoothed Forecasted Pricing (median)")),
+    RangeRule("E.", "Predicted Mean – Predicted Median",
+              ("Predicted Forecasted Pricing (mean)", "Predicted Forecasted Pricing (median)")),
+)
+
+
+def list_snapshots(drive_service, folder_id):
+    """Return every spreadsheet in the folder, newest first, following pagination."""
+    query = f"'{folder_id}' in parents and trashed = false and mimeType='{SPREADSHEET_MIME}'"
+    files = []
+    page_token = None
+    while True:
+        results = drive_service.files().list(
+            q=query,
+            fields="nextPageToken, files(id, name, createdTime)",
+            pageSize=1000,
+            pageToken=page_token,
+        ).execute()
+        files.extend(results.get("files", []))
+        page_token = results.get("nextPageToken")
+        if not page_token:
+            break
+    files.sort(key=lambda x: x["createdTime"], reverse=True)
+    return files
+
+
+def parse_prices(values):
+    """Price cells as a float Series; "$1,234.50", "1234.5" and 1234.5 all parse, anything else is NaN."""
+    text = pd.Series(values, dtype=object).astype(str)
+    return pd.to_numeric(text.str.replace(r"[$,]", "", regex=True), errors="coerce")
+
+
+def commercial_schema(**source):
+    """Schema of the commercial pipeline's Summary Sheet; ``source`` says where it lives."""
+    return PricingSchema(
+        key_columns=tuple(KEY_COLUMNS),
+        price_columns=tuple(PRICE_COLUMNS),
+        range_rules=COMMERCIAL_RANGE_RULES,
+        rounding_step=5,
+        **source,
+    )
+
+
+class PricingEngine:
+    """A loaded Summary Sheet with its price columns indexed by key.
+
+    Engines from ``load_engine`` are one cached object shared by every session,
+    so ``df``, ``prices``, ``info`` and ``spreadsheet`` are read-only: callers
+    must copy before modifying any of them.
+    """
+
+    def __init__(self, schema, df, client=None, creds=None, spreadsheet=None, spreadsheet_name=None):
+        self.schema = schema
+        self.df = df
+        self.client = client
+        self.creds = creds
+        self.spreadsheet = spreadsheet
+        self.spreadsheet_name = spreadsheet_name
+
+        keys = list(schema.key_columns)
+        unique = df.drop_duplicates(keys).set_index(keys) if not df.empty else \
+            pd.DataFrame(index=pd.MultiIndex.from_tuples([], names=keys))
+        price_columns = [c for c in schema.price_columns if c in unique.columns]
+        self.prices = unique[price_columns].apply(parse_prices).astype(float)
+        self.info = unique[[c for c in schema.info_columns if c in unique.columns]]
+        self.rules = [r for r in schema.range_rules if set(r.columns).issubset(price_columns)]
+
+    def keys(self):
+        """Distinct keys as a DataFrame, in first-seen sheet order."""
+        return self.prices.index.to_frame(index=False)
+
+    def info_for(self, key):
+        return self.info.loc[key].to_dict() if key in self.info.index else {}
+
+    def quote(self, parcels, discount=None):
+        """Price a batch of keys (a DataFrame of key columns, one row per parcel).
+
+        Returns ``(options, unmatched)``: options maps each rule label to
+        ``(description, [total_low, total_high])`` for every rule with a price
+        for every parcel, and unmatched holds the parcels missing from the
+        sheet. ``discount`` maps parcel positions (0 = first) to price
+        multipliers; within each bound the most expensive parcel takes position
+        0 and the rest follow in descending price order. No discount prices
+        every parcel in full.
+        """
+        keys = pd.MultiIndex.from_frame(parcels[list(self.schema.key_columns)])
+        found = keys.isin(self.prices.index)
+        unmatched = parcels[~found]
+        if not found.any() or not self.rules:
+            return {}, unmatched
+
+        prices = self.prices.reindex(keys[found])
+        first = prices[[r.columns[0] for r in self.rules]].to_numpy(dtype=np.float64)
+        second = prices[[r.columns[1] for r in self.rules]].to_numpy(dtype=np.float64)
+
+        multipliers = discount(np.arange(len(prices)))[:, None] if discount else 1.0
+        totals = []
+        for bound in (np.fmin(first, second), np.fmax(first, second)):
+            ordered = -np.sort(-bound, axis=0)
+            totals.append((ordered * multipliers).sum(axis=0))
+        complete = ~np.isnan(first).any(axis=0) & ~np.isnan(second).any(axis=0)
+
+        options = {
+            rule.label: (rule.description, [totals[0][i], totals[1][i]])
+            for i, rule in enumerate(self.rules) if complete[i]
+        }
+        return options, unmatched
+
+    def round_price(self, value):
+        step = self.schema.rounding_step
+        return int(-(-value // step) * step) if step else value
+
+    def format_price(self, value):
+        return f"${value:,}" if self.schema.rounding_step else f"${value:,.2f}"
+
+    def range_choices(self, options, separator=" - "):
+        """Round each option's bounds and drop repeated ranges, ordered by description.
+
+        Returns ``{range text: (label, description, low, high)}``.
+        """
+        choices = {}
+        seen_ranges = set()
+        for label, (desc, values) in sorted(options.items(), key=lambda item: item[1][0]):
+            lo, hi = [self.round_price(x) for x in values]
+            if (lo, hi) not in seen_ranges:
+                seen_ranges.add((lo, hi))
+                choices[f"{self.format_price(lo)}{separator}{self.format_price(hi)}"] = (label, desc, lo, hi)
+        return choices
+
+
+@st.cache_resource
+def authorize(keyfile=None):
+    """gspread client and credentials from a service account JSON file, or from Streamlit secrets."""
+    if keyfile:
+        creds = ServiceAccountCredentials.from_json_keyfile_name(keyfile, SCOPE)
+    else:
+        service_account_info = json.loads(st.secrets["google_sheets"]["json_key"])
+        creds = ServiceAccountCredentials.from_json_keyfile_dict(service_account_info, SCOPE)
+    return gspread.authorize(creds), creds
+
+
+@st.cache_resource(ttl=600, show_spinner="Loading pricing data...")
+def load_engine(schema):
+    """Fetch the schema's sheet and build its PricingEngine, shared by all sessions for 10 minutes."""
+    client, creds = authorize(schema.keyfile)
+
+    if schema.folder_id:
+        files = list_snapshots(build("drive", "v3", credentials=creds), schema.folder_id)
+        if not files:
+            raise NoSpreadsheetFound(schema.folder_id)
+        spreadsheet_id, spreadsheet_name = files[0]["id"], files[0]["name"]
+    else:
+        spreadsheet_id, spreadsheet_name = schema.spreadsheet_id, None
+
+    spreadsheet = client.open_by_key(spreadsheet_id)
+    df = pd.DataFrame(spreadsheet.worksheet(schema.worksheet).get_all_records())
+    return PricingEngine(schema, df, client, creds, spreadsheet, spreadsheet_name or spreadsheet.title)
+
+
+def open_engine(schema):
+    """load_engine for app scripts: reports a missing sheet in the page and stops the run."""
+    try:
+        return load_engine(schema)
+    except NoSpreadsheetFound:
+        st.error("No Google Sheets found in the folder.")
+    except gspread.exceptions.WorksheetNotFound:
+        st.error(f"'{schema.worksheet}' not found in the latest file.")
+    st.stop()
+
+
+def render_lookup_app(schema, title, subheader):
+    """Select type -> product -> Online/Offline, then show the schema's ranges for that key.
+
+    The first range rule is the headline price; any others are listed below
+    it, followed by the schema's info columns.
+    """
+    engine = open_engine(schema)
+    type_column, product_column, online_column = schema.key_columns
+
+    st.title(title)
+
+    if engine.df.empty:
+        st.warning("No prediction file found. Run the pipeline first.")
+        return
+
+    keys = engine.keys()
+    mapped_type = st.selectbox("Select Mapped Type", keys[type_column].unique())
+    keys = keys[keys[type_column] == mapped_type]
+
+    sorted_products = sorted(keys[product_column].unique(), key=lambda x: PRODUCT_HIERARCHY.get(x, float("inf")))
+    mapped_product = st.selectbox("Select Mapped Product Ordered", sorted_products)
+    keys = keys[keys[product_column] == mapped_product]
+
+    online_offline = st.selectbox("Select Online/Offline", keys[online_column].unique())
+    key = (mapped_type, mapped_product, online_offline)
+
+    if st.button("Predict Pricing"):
+        options, _ = engine.quote(pd.DataFrame([key], columns=list(schema.key_columns)))
+        if not options:
+            st.warning("No predictions available for the selected criteria.")
+            return
+
+        rules = [r for r in engine.rules if r.label in options]
+        st.subheader(subheader)
+        for i, rule in enumerate(rules):
+            lo, hi = [engine.round_price(x) for x in options[rule.label][1]]
+            text = engine.format_price(lo)
+            if not (rule.collapse and lo == hi):
+                text += f" – {engine.format_price(hi)}"
+            if i == 0:
+                st.markdown(f"<h4> {text} </h4>", unsafe_allow_html=True)
+            else:
+                st.markdown(f"**{rule.description}:** {text}")
+
+        info = engine.info_for(key)
+        for column in schema.info_columns:
+            st.markdown(f"<h6>{column}: <b>{info.get(column, 'Unknown')}</b></h6>", unsafe_allow_html=True)
+
+
+SELECTIONS_WORKSHEET = "User Prediction Selections"
+LEGACY_SELECTION_HEADERS = [
+    "Mapped Type", "Mapped Product Ordered", "Offline/Online",
+    "Selection Label", "Selected Range", "Range Start", "Range End", "Timestamp"
+]
+SELECTION_HEADERS = LEGACY_SELECTION_HEADERS + ["Parcel Count", "Discount Curve", "Parcels"]
+
+RADIO_STYLE = """
+    <style>
+    div.row-widget.stRadio > div{flex-direction: column;}
+    div[data-testid="stRadio"] label {
+        font-family: "Inter", sans-serif !important;
+        font-size: 16px !important;
+        font-weight: 400 !important;
+    }
+    div[data-testid="stRadio"] label span {
+        font-family: "Inter", sans-serif !important;
+        font-size: 16px !important;
+        font-weight: 400 !important;
+    }
+    div[data-testid="stRadio"] p {
+        font-family: "Inter", sans-serif !important;
+        font-size: 16px !important;
+        font-weight: 400 !important;
+    }
+    </style>
+"""
+
+
+def describe_parcels(parcels):
+    """Compact text for a list of parcel keys, e.g. "Retail / Update Search / Online x3; ..."."""
+    return "; ".join(
+        " / ".join(map(str, key)) + (f" x{count}" if count > 1 else "")
+        for key, count in Counter(parcels).items()
+    )
+
+
+def _range_sort_value(text):
+    try:
+        parts = text.replace('–', '-').split('-')
+        return int(parts[0].strip().strip('$').replace(',', ''))
+    except Exception:
+        return float('inf')
+
+
+def _reset_selection():
+    st.session_state.prediction_choices = {}
+    st.session_state.selection_made = False
+    st.session_state.selected_entry = None
+    st.session_state.show_manual_input = False
+
+
+def _open_selections_sheet(spreadsheet, headers):
+    """The submissions log, created or given ``headers`` as its header row as needed.
+
+    A log already extended with the order columns is kept as is, since the
+    original eight columns still line up for apps that only write those.
+    """
+    try:
+        submission_sheet = spreadsheet.worksheet(SELECTIONS_WORKSHEET)
+    except gspread.exceptions.WorksheetNotFound:
+        submission_sheet = spreadsheet.add_worksheet(title=SELECTIONS_WORKSHEET, rows="1000", cols="20")
+
+    existing_headers = submission_sheet.row_values(1)
+    if existing_headers in (headers, SELECTION_HEADERS):
+        return submission_sheet
+    if existing_headers == LEGACY_SELECTION_HEADERS:
+        # Extend the original header row in place so earlier submissions are kept
+        if submission_sheet.col_count < len(headers):
+            submission_sheet.add_cols(len(headers) - submission_sheet.col_count)
+        submission_sheet.update(range_name="A1", values=[headers])
+    else:
+        submission_sheet.clear()
+        submission_sheet.append_row(headers)
+    return submission_sheet
+
+
+def render_selection_app(schema, title, disclaimer, range_separator=" - ", reject_duplicates=False, order_input=None):
+    """Select a key, pick one of the schema's rounded price ranges (or enter one) and log it.
+
+    Choices are appended to the source spreadsheet's "User Prediction
+    Selections" sheet. ``range_separator`` joins the bounds in range labels and
+    ``reject_duplicates`` refuses a second submission of the same key and
+    selection label. ``order_input(engine, key)``, when given, renders extra
+    order inputs under the selectors and returns ``(parcels, discount_name,
+    discount)`` for PricingEngine.quote, and the log gains Parcel Count,
+    Discount Curve and Parcels columns; by default an order is the one
+    selected parcel at full price and the log keeps its original columns.
+
+    Returns the selected key, or None when the sheet is empty.
+    """
+    engine = open_engine(schema)
+    df = engine.df
+    type_column = schema.key_columns[0]
+    key = None
+
+    if schema.folder_id:
+        st.info(f"Using most recent sheet: **{engine.spreadsheet_name}**")
+
+    st.title(title)
+    st.markdown(f"**Disclaimer:** {disclaimer}")
+
+    if not df.empty:
+        mapped_type_options = list(df[type_column].unique())
+        mapped_type_options.append("Other")
+
+        selected_type = st.selectbox("Select Mapped Type", sorted(mapped_type_options))
+
+        if selected_type == "Other":
+            custom_type = st.text_input("Enter your Mapped Type:")
+            if custom_type:
+                mapped_type = custom_type.strip()
+            else:
+                st.warning("Please enter a custom mapped type.")
+                st.stop()
+        else:
+            mapped_type = selected_type
+
+        mapped_product = st.selectbox("Select Mapped Product Ordered", list(PRODUCT_HIERARCHY.keys()))
+        online_offline = st.selectbox("Select Online/Offline", ["Online", "Ground"])
+        key = (mapped_type, mapped_product, online_offline)
+
+        if order_input:
+            parcels, discount_name, discount = order_input(engine, key)
+        else:
+            parcels, discount_name, discount = pd.DataFrame([key], columns=list(schema.key_columns)), "No discount", None
+
+        if st.button("Predict Pricing"):
+            _reset_selection()
+
+            # Keep the order as quoted; order inputs can still change before submitting
+            st.session_state.quoted_parcels = [
+                tuple(k) for k in parcels[list(schema.key_columns)].itertuples(index=False)
+            ]
+            st.session_state.quoted_curve = discount_name
+
+            prediction_options, unmatched = engine.quote(parcels, discount)
+
+            if prediction_options and unmatched.empty:
+                st.session_state.prediction_choices = engine.range_choices(prediction_options, range_separator)
+            else:
+                if len(parcels) > 1 and not unmatched.empty:
+                    st.warning(f"No prediction found for {len(unmatched)} of {len(parcels)} parcels.")
+                st.session_state.show_manual_input = True
+
+    if st.session_state.get("show_manual_input", False):
+        manual_entry = st.number_input("No prediction found. Enter your own predicted value:", min_value=0, format="%d", key="manual_val_no_prediction", value=None)
+        if manual_entry is not None and manual_entry > 0:
+            st.session_state.selection_made = True
+            st.session_state.selected_entry = ("Manual", "Manual", manual_entry, '')
+
+    if st.session_state.get("prediction_choices"):
+        st.subheader("Select Closest Price Range")
+        st.markdown(RADIO_STYLE, unsafe_allow_html=True)
+
+        price_options = sorted(st.session_state.prediction_choices.keys(), key=_range_sort_value)
+        selected_text = st.radio(
+            "Choose range:",
+            options=price_options + ["Other (Enter manually)"],
+            index=None,
+            label_visibility="collapsed"
+        )
+
+        if selected_text is not None:
+            if selected_text == "Other (Enter manually)":
+                manual_entry = st.number_input("Enter your own predicted value:", min_value=0, format="%d", key="manual_val_radio_other", value=None)
+                if manual_entry is not None and manual_entry > 0:
+                    st.session_state.selection_made = True
+                    st.session_state.selected_entry = ("Manual", "Manual", manual_entry, '')
+            else:
+                st.session_state.selection_made = True
+                st.session_state.selected_entry = st.session_state.prediction_choices[selected_text]
+                st.success(f"You selected: {selected_text}")
+
+    if st.session_state.get("selection_made", False) and st.button("Submit to Sheet"):
+        label, desc, lo, hi = st.session_state.selected_entry
+        if label == "Manual":
+            if st.session_state.get("show_manual_input", False):
+                manual_val = st.session_state.get("manual_val_no_prediction")
+            else:
+                manual_val = st.session_state.get("manual_val_radio_other")
+            lo = int(manual_val) if manual_val is not None else 0
+            hi = ''
+        timestamp = pd.Timestamp.now().strftime("%Y-%m-%d")
+
+        order = st.session_state.get("quoted_parcels") or [key]
+        order_key = [str(v) for v in order[0]]
+
+        try:
+            submission_sheet = _open_selections_sheet(
+                engine.spreadsheet, SELECTION_HEADERS if order_input else LEGACY_SELECTION_HEADERS
+            )
+
+            # Only the key and label columns are read back, never the whole log
+            if reject_duplicates and any(
+                row[:4] == order_key + [label] for row in submission_sheet.get("A2:D")
+            ):
+                st.warning("You've already submitted this selection.")
+            else:
+                if label == "Manual":
+                    selected_range_text = "Manual Entry"
+                else:
+                    selected_range_text = f"${int(lo):,}" if hi == '' else f"${int(lo):,} – ${int(hi):,}"
+                submission_row = [
+                    *order[0],
+                    label,
+                    selected_range_text,
+                    int(lo),
+                    int(hi) if hi != '' else '',
+                    timestamp
+                ]
+                if order_input:
+                    submission_row += [
+                        len(order),
+                        st.session_state.get("quoted_curve", "No discount"),
+                        describe_parcels(order) if len(set(order)) > 1 else ''
+                    ]
+                submission_sheet.append_row(submission_row)
+                st.success("Your selected range has been recorded.")
+                _reset_selection()
+                st.session_state.quoted_parcels = None
+
+        except Exception as e:
+            st.error(f"Failed to record selection: {e}")
+
+    return key